@@ -27,11 +27,26 @@ def create_app(config_name=None):
     app = Flask(__name__)
     app.config.from_object(config.get(config_name, config['default']))
 
+    from app.serializers import FastJSONProvider
+    app.json = FastJSONProvider(app)
+
     db.init_app(app)
 
     with app.app_context():
         from app import routes
+        from app.debts import check_debts_command
+        from app.expenses import compact_expenses_command, upgrade_expense_table
         app.register_blueprint(routes.bp)
+        app.cli.add_command(check_debts_command)
+        app.cli.add_command(compact_expenses_command)
+
+        with db.engine.begin() as connection:
+            upgrade_expense_table(connection)
         db.create_all()
 
+        # Tables created before full-text search existed need their index built
+        from app.search import create_fulltext_index
+        with db.engine.begin() as connection:
+            create_fulltext_index(connection)
+
     return app
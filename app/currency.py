@@ -0,0 +1,119 @@
+"""
+Currency conversion for multi-currency expenses.
+
+Rates live in the ``ExchangeRate`` table and are read with one indexed
+lookup on (currency, date) when an expense is written; they are not
+cached, so every worker sees a rate as soon as it is committed. Each
+expense stores the rate in effect on its date as ``fx_rate``, so balances
+are converted in bulk inside the aggregate query (``SUM(amount *
+fx_rate)``) with no per-row lookups, and a multi-currency sheet costs the
+same as a single-currency one. When a rate changes, the expenses it
+applies to are repriced in one UPDATE and the pairwise debt table is
+adjusted by the difference.
+"""
+from datetime import datetime
+
+from flask import current_app
+from sqlalchemy import func, select, update
+
+from app import db
+from app.models import Expense, ExpenseSplit, ExchangeRate
+from app.debts import apply_debt_deltas
+
+
+class CurrencyError(ValueError):
+    """Raised for unknown currencies or missing exchange rates."""
+
+
+def base_currency():
+    """Return the (normalized) currency balances are reported in."""
+    return normalize_currency(current_app.config['BASE_CURRENCY'])
+
+
+def normalize_currency(code):
+    """
+    Validate and upper-case an ISO 4217 style currency code.
+
+    Raises:
+        CurrencyError: If the code is not three letters
+    """
+    if not isinstance(code, str) or len(code) != 3 or not code.isalpha():
+        raise CurrencyError(f'Invalid currency code: {code}')
+    return code.upper()
+
+
+def get_rate(currency, day):
+    """
+    Return the base-currency value of one unit of ``currency`` on ``day``.
+
+    Uses the latest rate on or before ``day``.
+
+    Args:
+        currency: Currency code
+        day: Date or datetime
+
+    Raises:
+        CurrencyError: If no rate is known for that currency and date
+    """
+    if currency == base_currency():
+        return 1.0
+
+    if isinstance(day, datetime):
+        day = day.date()
+
+    rate = db.session.execute(
+        select(ExchangeRate.rate)
+        .where(ExchangeRate.currency == currency, ExchangeRate.date <= day)
+        .order_by(ExchangeRate.date.desc())
+        .limit(1)
+    ).scalar()
+    if rate is None:
+        raise CurrencyError(f'No exchange rate for {currency} on or before {day.isoformat()}')
+    return rate
+
+
+def set_rate(currency, day, rate):
+    """
+    Insert or update the rate for ``currency`` on ``day`` in the session.
+
+    Expenses from ``day`` up to the next known rate are repriced and their
+    debts adjusted by the difference. The caller commits.
+
+    Raises:
+        CurrencyError: If ``currency`` is the base currency
+    """
+    if currency == base_currency():
+        raise CurrencyError(f'{currency} is the base currency and always has rate 1')
+
+    existing = ExchangeRate.query.filter_by(currency=currency, date=day).first()
+    if existing is None:
+        db.session.add(ExchangeRate(currency=currency, date=day, rate=rate))
+    else:
+        existing.rate = rate
+
+    affected = [
+        Expense.currency == currency,
+        Expense.deleted_at.is_(None),
+        Expense.date >= datetime.combine(day, datetime.min.time())
+    ]
+    next_day = db.session.execute(
+        select(func.min(ExchangeRate.date))
+        .where(ExchangeRate.currency == currency, ExchangeRate.date > day)
+    ).scalar()
+    if next_day is not None:
+        affected.append(Expense.date < datetime.combine(next_day, datetime.min.time()))
+
+    deltas = db.session.execute(
+        select(
+            ExpenseSplit.user_id, Expense.payer_id,
+            func.sum(ExpenseSplit.amount * (rate - Expense.fx_rate))
+        )
+        .join(Expense, ExpenseSplit.expense_id == Expense.id)
+        .where(ExpenseSplit.user_id != Expense.payer_id, *affected)
+        .group_by(ExpenseSplit.user_id, Expense.payer_id)
+    )
+    apply_debt_deltas({(debtor_id, creditor_id): amount for debtor_id, creditor_id, amount in deltas})
+    db.session.execute(
+        update(Expense).where(*affected).values(fx_rate=rate),
+        execution_options={'synchronize_session': False}
+    )
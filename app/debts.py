@@ -0,0 +1,230 @@
+"""
+Pairwise debt tracking for the Daily Expense Sharing Application.
+
+Every split paid by someone else means its user owes the payer that amount,
+converted to the base currency at the expense date's rate. Those amounts
+are accumulated in the ``Debt`` table inside the same transaction that
+writes the expense, so reading who owes whom costs one indexed lookup per
+counterparty instead of a scan over every split. The table can always be
+rebuilt from ``ExpenseSplit`` rows with :func:`check_debts`.
+"""
+from collections import defaultdict
+
+import click
+from sqlalchemy import delete, event, func, insert, or_, select, tuple_, update
+from sqlalchemy.dialects import postgresql, sqlite
+
+from app import db
+from app.models import Debt, Expense, ExpenseSplit, User
+
+# Amounts closer than this are treated as equal (floats accumulate error)
+TOLERANCE = 1e-6
+
+# Dialects whose INSERT supports ON CONFLICT DO UPDATE
+_UPSERT_INSERTS = {'sqlite': sqlite.insert, 'postgresql': postgresql.insert}
+
+
+def _raw_debts_query():
+    """Select (debtor_id, creditor_id, amount) aggregated from raw splits."""
+    return (
+        select(
+            ExpenseSplit.user_id.label('debtor_id'),
+            Expense.payer_id.label('creditor_id'),
+            func.sum(ExpenseSplit.amount * Expense.fx_rate).label('amount')
+        )
+        .join(Expense, ExpenseSplit.expense_id == Expense.id)
+        .where(ExpenseSplit.user_id != Expense.payer_id, Expense.deleted_at.is_(None))
+        .group_by(ExpenseSplit.user_id, Expense.payer_id)
+    )
+
+
+def apply_debt_deltas(deltas):
+    """
+    Add amounts to stored debts in the current session.
+
+    Amounts are added in SQL (``amount = amount + delta``) so concurrent
+    transactions never overwrite each other's changes. New pairs are
+    inserted with an upsert where the dialect supports one, and rows that
+    reach zero are deleted afterwards. The caller commits.
+
+    Args:
+        deltas: Mapping of (debtor_id, creditor_id) to the amount to add
+    """
+    deltas = {pair: amount for pair, amount in deltas.items() if abs(amount) > TOLERANCE}
+    if not deltas:
+        return
+
+    table = Debt.__table__
+    rows = [
+        {'debtor_id': debtor_id, 'creditor_id': creditor_id, 'amount': amount}
+        for (debtor_id, creditor_id), amount in deltas.items()
+    ]
+    dialect_insert = _UPSERT_INSERTS.get(db.session.get_bind().dialect.name)
+    if dialect_insert is not None:
+        stmt = dialect_insert(table)
+        db.session.execute(stmt.on_conflict_do_update(
+            index_elements=[table.c.debtor_id, table.c.creditor_id],
+            set_={'amount': table.c.amount + stmt.excluded.amount}
+        ), rows)
+    else:
+        for row in rows:
+            result = db.session.execute(
+                update(table)
+                .where(table.c.debtor_id == row['debtor_id'], table.c.creditor_id == row['creditor_id'])
+                .values(amount=table.c.amount + row['amount'])
+            )
+            if result.rowcount == 0:
+                db.session.execute(insert(table), [row])
+
+    db.session.execute(delete(table).where(
+        tuple_(table.c.debtor_id, table.c.creditor_id).in_(list(deltas)),
+        func.abs(table.c.amount) <= TOLERANCE
+    ))
+
+
+def debt_deltas(payer_id, shares, rate=1.0, sign=1, deltas=None):
+    """
+    Compute the debt changes caused by an expense's splits.
+
+    Args:
+        payer_id: ID of the user who paid
+        shares: Iterable of (user_id, amount) pairs, one per split
+        rate: Exchange rate from the expense currency to the base currency
+        sign: 1 when adding an expense, -1 when removing one
+        deltas: Existing mapping to accumulate into, so removing an old
+                version and adding a new one nets out unchanged pairs
+
+    Returns:
+        Mapping of (debtor_id, creditor_id) to the amount to add
+    """
+    if deltas is None:
+        deltas = defaultdict(float)
+    for user_id, amount in shares:
+        if user_id != payer_id:
+            deltas[(user_id, payer_id)] += sign * amount * rate
+    return deltas
+
+
+def record_debts(payer_id, shares, sign=1, rate=1.0):
+    """
+    Record what each participant owes the payer of an expense.
+
+    Args:
+        payer_id: ID of the user who paid
+        shares: Iterable of (user_id, amount) pairs, one per split
+        sign: 1 when adding an expense, -1 when removing one
+        rate: Exchange rate from the expense currency to the base currency
+    """
+    apply_debt_deltas(debt_deltas(payer_id, shares, rate=rate, sign=sign))
+
+
+def get_user_debts(user_id):
+    """
+    Summarise a user's debts with each counterparty.
+
+    Returns:
+        List of dictionaries with 'user_id', 'name', 'owes' (what this user
+        owes them), 'owed' (what they owe this user) and 'net' (positive
+        when they owe this user), ordered by counterparty id
+    """
+    rows = db.session.execute(
+        select(Debt.debtor_id, Debt.creditor_id, Debt.amount)
+        .where(or_(Debt.debtor_id == user_id, Debt.creditor_id == user_id))
+    )
+
+    summary = {}
+    for debtor_id, creditor_id, amount in rows:
+        if debtor_id == user_id:
+            entry = summary.setdefault(creditor_id, {'owes': 0, 'owed': 0})
+            entry['owes'] += amount
+        else:
+            entry = summary.setdefault(debtor_id, {'owes': 0, 'owed': 0})
+            entry['owed'] += amount
+
+    if not summary:
+        return []
+
+    names = dict(db.session.execute(
+        select(User.id, User.name).where(User.id.in_(list(summary)))
+    ).all())
+    return [
+        {
+            'user_id': other_id,
+            'name': names.get(other_id),
+            'owes': entry['owes'],
+            'owed': entry['owed'],
+            'net': entry['owed'] - entry['owes']
+        }
+        for other_id, entry in sorted(summary.items())
+    ]
+
+
+def check_debts(repair=False):
+    """
+    Compare stored debts with totals recomputed from raw splits.
+
+    Args:
+        repair: Rebuild the table from raw splits when mismatches are found
+
+    Returns:
+        List of mismatches as dictionaries with 'debtor_id', 'creditor_id',
+        'stored' and 'expected' keys (empty when consistent)
+    """
+    expected = {
+        (row.debtor_id, row.creditor_id): row.amount
+        for row in db.session.execute(_raw_debts_query())
+    }
+    stored = {
+        (row.debtor_id, row.creditor_id): row.amount
+        for row in db.session.execute(select(Debt.debtor_id, Debt.creditor_id, Debt.amount))
+    }
+
+    mismatches = []
+    for pair in sorted(set(expected) | set(stored)):
+        expected_amount = expected.get(pair, 0)
+        stored_amount = stored.get(pair, 0)
+        if abs(expected_amount - stored_amount) > TOLERANCE:
+            mismatches.append({
+                'debtor_id': pair[0],
+                'creditor_id': pair[1],
+                'stored': stored_amount,
+                'expected': expected_amount
+            })
+
+    if mismatches and repair:
+        db.session.execute(delete(Debt))
+        _rebuild(db.session)
+        db.session.commit()
+
+    return mismatches
+
+
+def _rebuild(connection):
+    connection.execute(insert(Debt).from_select(
+        ['debtor_id', 'creditor_id', 'amount'], _raw_debts_query()
+    ))
+
+
+@event.listens_for(db.metadata, 'after_create')
+def _backfill_debts(target, connection, tables=(), **kw):
+    # Databases that predate the Debt table get it populated on creation
+    if Debt.__table__ in tables:
+        _rebuild(connection)
+
+
+@click.command('check-debts')
+@click.option('--repair', is_flag=True, help='Rebuild the debt table if it is inconsistent.')
+def check_debts_command(repair):
+    """Verify the pairwise debt table against raw expense splits."""
+    mismatches = check_debts(repair=repair)
+    for mismatch in mismatches:
+        click.echo(
+            f"debtor {mismatch['debtor_id']} -> creditor {mismatch['creditor_id']}: "
+            f"stored {mismatch['stored']}, expected {mismatch['expected']}"
+        )
+    if not mismatches:
+        click.echo('Debt table is consistent.')
+    elif repair:
+        click.echo(f'Rebuilt debt table ({len(mismatches)} mismatches).')
+    else:
+        raise SystemExit(1)
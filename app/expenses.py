@@ -0,0 +1,82 @@
+"""
+Expense table maintenance for the Daily Expense Sharing Application.
+
+Deleted expenses are kept as tombstones (``deleted_at`` set) so deletes
+are cheap and their debts can be reversed in the same transaction. Every
+read filters them out, and :func:`compact_expenses` purges them together
+with their splits so the tables scanned by balance computations stay small.
+"""
+from datetime import datetime, timedelta
+
+import click
+from flask import current_app
+from sqlalchemy import delete, inspect, select, text
+
+from app import db
+from app.models import Expense, ExpenseSplit
+from app.currency import base_currency
+
+
+def upgrade_expense_table(connection):
+    """Add columns and indexes introduced after the expense table was first created."""
+    inspector = inspect(connection)
+    if not inspector.has_table('expense'):
+        return
+    columns = {column['name'] for column in inspector.get_columns('expense')}
+    added = {
+        'currency': "NOT NULL DEFAULT '%s'" % base_currency(),
+        'fx_rate': 'NOT NULL DEFAULT 1.0',
+        'deleted_at': '',
+    }
+    for name, constraints in added.items():
+        if name not in columns:
+            # Types come from the model so they render for each dialect
+            column_type = Expense.__table__.c[name].type.compile(dialect=connection.dialect)
+            connection.execute(text(f'ALTER TABLE expense ADD COLUMN {name} {column_type} {constraints}'.rstrip()))
+    # create_all() only indexes tables it creates itself
+    for index in Expense.__table__.indexes:
+        index.create(connection, checkfirst=True)
+
+
+def compact_expenses(older_than=None, batch_size=1000):
+    """
+    Physically delete tombstoned expenses and their splits.
+
+    Their debts were already reversed when they were deleted, so no
+    aggregates change. Rows are removed in batches, each in its own
+    transaction, to keep locks short.
+
+    Args:
+        older_than: Only purge expenses deleted at least this long ago
+                    (a timedelta); defaults to ``TOMBSTONE_RETENTION_DAYS``
+        batch_size: Number of expenses removed per transaction
+
+    Returns:
+        Number of expenses purged
+    """
+    if older_than is None:
+        older_than = timedelta(days=current_app.config.get('TOMBSTONE_RETENTION_DAYS', 7))
+    cutoff = datetime.utcnow() - older_than
+
+    purged = 0
+    while True:
+        ids = db.session.execute(
+            select(Expense.id)
+            .where(Expense.deleted_at.is_not(None), Expense.deleted_at <= cutoff)
+            .limit(batch_size)
+        ).scalars().all()
+        if not ids:
+            return purged
+        db.session.execute(delete(ExpenseSplit).where(ExpenseSplit.expense_id.in_(ids)))
+        db.session.execute(delete(Expense).where(Expense.id.in_(ids)))
+        db.session.commit()
+        purged += len(ids)
+
+
+@click.command('compact-expenses')
+@click.option('--older-than-days', type=float, default=None,
+              help='Purge expenses deleted at least this many days ago.')
+def compact_expenses_command(older_than_days):
+    """Purge deleted expenses and their splits."""
+    older_than = None if older_than_days is None else timedelta(days=older_than_days)
+    click.echo(f'Purged {compact_expenses(older_than)} deleted expenses.')
@@ -0,0 +1,208 @@
+"""
+Health and readiness checks for the Daily Expense Sharing Application.
+
+Probes are hit every few seconds by Kubernetes, so everything here is kept
+cheap: the database ping is cached and rate-limited, pool statistics are read
+from in-process counters, and in-flight requests are tracked with a counter
+rather than by inspecting the server.
+"""
+import threading
+import time
+
+from flask import current_app
+from sqlalchemy import text
+
+from app import db
+
+_lock = threading.Lock()
+_ping_guard = threading.Lock()
+_inflight = 0
+_last_ping = {'checked_at': None, 'ok': False, 'error': None, 'latency_ms': None}
+
+
+def request_started():
+    """Record the start of a request for queue saturation tracking."""
+    global _inflight
+    with _lock:
+        _inflight += 1
+
+
+def request_finished():
+    """Record the end of a request for queue saturation tracking."""
+    global _inflight
+    with _lock:
+        _inflight = max(_inflight - 1, 0)
+
+
+def inflight_requests():
+    """Return the number of requests currently being served by this process."""
+    return _inflight
+
+
+def _run_ping(engine, logger, timeout):
+    """Ping the database and record the result, then release the guard."""
+    try:
+        started = time.monotonic()
+        try:
+            with engine.connect() as connection:
+                if connection.dialect.name == 'postgresql':
+                    connection.execute(text('SET LOCAL statement_timeout = %d' % int(timeout * 1000)))
+                connection.execute(text('SELECT 1'))
+            ok, error = True, None
+        except Exception as e:
+            # Driver messages can carry hostnames and credentials, so
+            # they are logged rather than returned by the endpoints
+            logger.warning('Database health check failed: %s', e)
+            ok, error = False, 'database unreachable'
+        finished = time.monotonic()
+        with _lock:
+            _last_ping.update(
+                checked_at=finished,
+                ok=ok,
+                error=error,
+                latency_ms=round((finished - started) * 1000, 3)
+            )
+    finally:
+        _ping_guard.release()
+
+
+def ping_database(force=False, refresh=True):
+    """
+    Check database connectivity with a cached, rate-limited ``SELECT 1``.
+
+    The result of the last ping is reused until ``HEALTH_DB_CHECK_INTERVAL``
+    seconds have passed, so frequent probes cost at most one round trip per
+    interval. Only one caller performs the ping when the cache expires.
+
+    The ping runs in a background thread and the caller waits at most
+    ``HEALTH_DB_PING_TIMEOUT`` seconds for it, so a database that hangs
+    instead of refusing connections cannot block the probe. A result older
+    than ``HEALTH_DB_MAX_AGE`` seconds, e.g. because a ping is still stuck,
+    is reported as not ok.
+
+    Args:
+        force: Ignore the cached result and ping immediately
+        refresh: When False, only report the last result and never connect
+
+    Returns:
+        Dictionary with 'ok', 'error', 'latency_ms' and 'age_seconds' keys
+    """
+    config = current_app.config
+    interval = config.get('HEALTH_DB_CHECK_INTERVAL', 5)
+    timeout = config.get('HEALTH_DB_PING_TIMEOUT', 2)
+    checked_at = _last_ping['checked_at']
+    stale = refresh and (force or checked_at is None or time.monotonic() - checked_at >= interval)
+
+    if stale and _ping_guard.acquire(blocking=False):
+        previous = checked_at
+        worker = threading.Thread(
+            target=_run_ping,
+            args=(db.engine, current_app.logger, timeout),
+            name='database-health-check',
+            daemon=True
+        )
+        worker.start()
+        worker.join(timeout)
+        with _lock:
+            # Unless the ping finished in the meantime, record the timeout
+            if _last_ping['checked_at'] == previous:
+                current_app.logger.warning('Database health check timed out after %ss', timeout)
+                _last_ping.update(
+                    checked_at=time.monotonic(),
+                    ok=False,
+                    error='database check timed out',
+                    latency_ms=None
+                )
+
+    with _lock:
+        result = dict(_last_ping)
+    checked_at = result.pop('checked_at')
+    age = None if checked_at is None else time.monotonic() - checked_at
+    result['age_seconds'] = None if age is None else round(age, 3)
+    if age is not None and age > config.get('HEALTH_DB_MAX_AGE', 3 * interval):
+        result.update(ok=False, error='database check stale')
+    return result
+
+
+def pool_status():
+    """
+    Report connection pool usage for the current engine.
+
+    Usage is measured against the pool's steady-state ``size``: once
+    overflow connections are needed the pool is saturated. Pools without a
+    fixed size (e.g. the one in-memory SQLite uses) report a ``usage`` of
+    None and are never considered saturated.
+
+    Returns:
+        Dictionary with 'size', 'checked_out', 'overflow', 'capacity' and 'usage'
+    """
+    pool = db.engine.pool
+    size = pool.size() if hasattr(pool, 'size') else None
+    checked_out = pool.checkedout() if hasattr(pool, 'checkedout') else None
+    overflow = pool.overflow() if hasattr(pool, 'overflow') else None
+    max_overflow = getattr(pool, '_max_overflow', 0)
+
+    capacity = None
+    usage = None
+    if size is not None and checked_out is not None:
+        capacity = size + max_overflow if max_overflow >= 0 else None
+        usage = round(checked_out / size, 3) if size else None
+
+    return {
+        'class': type(pool).__name__,
+        'size': size,
+        'checked_out': checked_out,
+        'overflow': overflow,
+        'capacity': capacity,
+        'usage': usage
+    }
+
+
+def queue_status():
+    """
+    Report in-flight request usage against ``HEALTH_MAX_INFLIGHT_REQUESTS``.
+
+    The probe requesting this status is excluded from the count.
+    """
+    limit = current_app.config.get('HEALTH_MAX_INFLIGHT_REQUESTS')
+    inflight = max(inflight_requests() - 1, 0)
+    usage = round(inflight / limit, 3) if limit else None
+    return {'inflight': inflight, 'limit': limit, 'usage': usage}
+
+
+def readiness():
+    """
+    Decide whether this instance should receive traffic.
+
+    The instance is not ready when the database ping fails or when pool or
+    request usage reaches ``HEALTH_SATURATION_THRESHOLD``, so the load
+    balancer sheds load before requests start queueing for connections.
+    The pool is inspected first and the ping is skipped while it is
+    saturated, so the probe never waits on a connection itself.
+
+    Returns:
+        Tuple of (ready, report dictionary)
+    """
+    threshold = current_app.config.get('HEALTH_SATURATION_THRESHOLD', 0.9)
+    pool = pool_status()
+    queue = queue_status()
+
+    reasons = []
+    if pool['usage'] is not None and pool['usage'] >= threshold:
+        reasons.append('connection pool saturated')
+        database = None
+    else:
+        database = ping_database()
+        if not database['ok']:
+            reasons.append('database unreachable')
+    if queue['usage'] is not None and queue['usage'] >= threshold:
+        reasons.append('request queue saturated')
+
+    ready = not reasons
+    return ready, {
+        'status': 'ready' if ready else 'not ready',
+        'reasons': reasons,
+        'database': database,
+        'pool': pool,
+        'queue': queue
+    }
@@ -1,6 +1,12 @@
 from app import db
 from datetime import datetime
 
+
+def _default_currency():
+    # Imported here because app.currency imports these models
+    from app.currency import base_currency
+    return base_currency()
+
 class User(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     email = db.Column(db.String(120), unique=True, nullable=False)
@@ -13,9 +19,31 @@ class Expense(db.Model):
     description = db.Column(db.String(200), nullable=False)
     date = db.Column(db.DateTime, default=datetime.utcnow)
     split_method = db.Column(db.String(20), nullable=False)
+    currency = db.Column(db.String(3), nullable=False, default=_default_currency)
+    # Base-currency value of one unit of ``currency`` on ``date``, kept in
+    # sync with ExchangeRate so balances can be summed without lookups
+    fx_rate = db.Column(db.Float, nullable=False, default=1.0)
     payer_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    # Set when the expense is deleted; the row is purged later by compaction
+    deleted_at = db.Column(db.DateTime)
     payer = db.relationship('User', backref=db.backref('expenses', lazy=True))
 
+    # Composite indexes serve keyset pagination on (date, id), alone or after
+    # an equality filter on payer or split method
+    __table_args__ = (
+        db.Index('ix_expense_date_id', 'date', 'id'),
+        db.Index('ix_expense_payer_date_id', 'payer_id', 'date', 'id'),
+        db.Index('ix_expense_split_method_date_id', 'split_method', 'date', 'id'),
+        db.Index('ix_expense_amount', 'amount'),
+        # Partial, so it only covers tombstones (for compaction) and the
+        # planner never prefers it over the (date, id) indexes for live rows
+        db.Index(
+            'ix_expense_deleted_at', 'deleted_at',
+            sqlite_where=db.text('deleted_at IS NOT NULL'),
+            postgresql_where=db.text('deleted_at IS NOT NULL')
+        ),
+    )
+
 class ExpenseSplit(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     expense_id = db.Column(db.Integer, db.ForeignKey('expense.id'), nullable=False)
@@ -25,3 +53,36 @@ class ExpenseSplit(db.Model):
 
     expense = db.relationship('Expense', backref=db.backref('splits', lazy=True))
     user = db.relationship('User', backref=db.backref('splits', lazy=True))
+
+class Debt(db.Model):
+    """
+    Running total of what one user owes another across all expenses.
+
+    Maintained incrementally when expenses are written, so a user's debts
+    can be read without scanning ExpenseSplit. Amounts are gross per
+    direction; netting happens when reading.
+    """
+    id = db.Column(db.Integer, primary_key=True)
+    debtor_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    creditor_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    amount = db.Column(db.Float, nullable=False, default=0)
+
+    __table_args__ = (
+        db.UniqueConstraint('debtor_id', 'creditor_id', name='uq_debt_debtor_creditor'),
+        db.Index('ix_debt_creditor_debtor', 'creditor_id', 'debtor_id'),
+    )
+
+class ExchangeRate(db.Model):
+    """
+    Value of one unit of ``currency`` in the base currency on ``date``.
+
+    The rate used for an expense is the latest one on or before its date.
+    """
+    id = db.Column(db.Integer, primary_key=True)
+    currency = db.Column(db.String(3), nullable=False)
+    date = db.Column(db.Date, nullable=False)
+    rate = db.Column(db.Float, nullable=False)
+
+    __table_args__ = (
+        db.UniqueConstraint('currency', 'date', name='uq_exchange_rate_currency_date'),
+    )
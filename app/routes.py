@@ -1,11 +1,19 @@
 # import io
 from flask import Blueprint, jsonify, request, current_app
+from werkzeug.exceptions import HTTPException
 # from flask import request, jsonify
 # from werkzeug.security import check_password_hash
 # from flask_jwt_extended import create_access_token
-from app.models import User, Expense, ExpenseSplit
+import math
+from datetime import date, datetime
+from app.models import User, Expense, ExpenseSplit, ExchangeRate
+from sqlalchemy import select
 from app.utils import validate_percentage_split, generate_balance_sheet
-from app import db
+from app.serializers import serialize_rows
+from app.search import SearchError, search_expenses
+from app.debts import apply_debt_deltas, debt_deltas, get_user_debts, record_debts
+from app.currency import CurrencyError, base_currency, get_rate, normalize_currency, set_rate
+from app import db, health
 # from flask import request, jsonify
 # from flask_jwt_extended import jwt_required, get_jwt_identity
 # from flask import request, jsonify
@@ -35,10 +43,73 @@ def get_user(user_id):
         'mobile': user.mobile
     })
 
+@bp.before_app_request
+def track_request_start():
+    health.request_started()
+
+@bp.teardown_app_request
+def track_request_end(exception=None):
+    health.request_finished()
+
+@bp.route('/healthz', methods=['GET'])
+def healthz():
+    # Liveness only reflects the process. The last ping made by /readyz is
+    # reported, but never refreshed here, so a hanging database cannot
+    # time out this probe and get pods restarted
+    return jsonify({
+        'status': 'ok',
+        'database': health.ping_database(refresh=False)
+    }), 200
+
+@bp.route('/readyz', methods=['GET'])
+def readyz():
+    ready, report = health.readiness()
+    return jsonify(report), 200 if ready else 503
+
 @bp.route('/test', methods=['GET'])
 def test_route():
     return jsonify({"message": "Test route working"})
 
+def _add_splits(expense, data):
+    """
+    Create the splits for ``expense`` from request data.
+
+    Returns the list of (user_id, amount) shares, or None when percentage
+    splits do not add up to 100%.
+    """
+    shares = []
+
+    if data['split_method'] == 'equal':
+        total_participants = len(data['participants'])
+        split_amount = data['amount'] / total_participants
+        for participant_id in data['participants']:
+            participant = User.query.get_or_404(participant_id)
+            split = ExpenseSplit(expense=expense, user=participant, amount=split_amount)
+            db.session.add(split)
+            shares.append((participant.id, split_amount))
+
+    elif data['split_method'] == 'exact':
+        for split in data['splits']:
+            participant = User.query.get_or_404(split['user_id'])
+            split = ExpenseSplit(expense=expense, user=participant, amount=split['amount'])
+            db.session.add(split)
+            shares.append((participant.id, split.amount))
+
+    elif data['split_method'] == 'percentage':
+        if not validate_percentage_split(data['splits']):
+            return None
+        for split in data['splits']:
+            participant = User.query.get_or_404(split['user_id'])
+            amount = (split['percentage'] / 100) * data['amount']
+            split = ExpenseSplit(expense=expense, user=participant, amount=amount, percentage=split['percentage'])
+            db.session.add(split)
+            shares.append((participant.id, amount))
+
+    return shares
+
+def _get_live_expense_or_404(expense_id):
+    return Expense.query.filter_by(id=expense_id, deleted_at=None).first_or_404()
+
 @bp.route('/expenses/', methods=['POST'])
 @bp.route('/expenses', methods=['POST'])
 def add_expense():
@@ -50,57 +121,103 @@ def add_expense():
         payer = User.query.get_or_404(data['payer_id'])
         print("Found payer:", payer.name)
         
+        currency = normalize_currency(data.get('currency', base_currency()))
+        expense_date = datetime.utcnow()
+        rate = get_rate(currency, expense_date)
+
         expense = Expense(
             amount=data['amount'],
             description=data['description'],
             split_method=data['split_method'],
+            currency=currency,
+            fx_rate=rate,
+            date=expense_date,
             payer=payer
         )
         db.session.add(expense)
         print("Added expense to session")
+        shares = _add_splits(expense, data)
+        if shares is None:
+            return jsonify({'error': 'Percentage splits must add up to 100%'}), 400
 
-        if data['split_method'] == 'equal':
-            total_participants = len(data['participants'])
-            split_amount = data['amount'] / total_participants
-            for participant_id in data['participants']:
-                participant = User.query.get_or_404(participant_id)
-                split = ExpenseSplit(expense=expense, user=participant, amount=split_amount)
-                db.session.add(split)
-
-        elif data['split_method'] == 'exact':
-            for split in data['splits']:
-                participant = User.query.get_or_404(split['user_id'])
-                split = ExpenseSplit(expense=expense, user=participant, amount=split['amount'])
-                db.session.add(split)
-
-        elif data['split_method'] == 'percentage':
-            if not validate_percentage_split(data['splits']):
-                return jsonify({'error': 'Percentage splits must add up to 100%'}), 400
-            for split in data['splits']:
-                participant = User.query.get_or_404(split['user_id'])
-                amount = (split['percentage'] / 100) * data['amount']
-                split = ExpenseSplit(expense=expense, user=participant, amount=amount, percentage=split['percentage'])
-                db.session.add(split)
+        record_debts(payer.id, shares, rate=rate)
 
         print("Committing to database")
         db.session.commit()
         print("Commit successful")
         return jsonify({'message': 'Expense added successfully'}), 201
 
+    except CurrencyError as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 400
+
     except Exception as e:
         print("Error occurred:", str(e))
         db.session.rollback()
         return jsonify({'error': str(e)}), 500
 
+@bp.route('/expenses/<int:expense_id>', methods=['PUT'])
+def update_expense(expense_id):
+    expense = _get_live_expense_or_404(expense_id)
+    try:
+        data = request.json
+        payer = User.query.get_or_404(data['payer_id'])
+        currency = normalize_currency(data.get('currency', expense.currency))
+        rate = get_rate(currency, expense.date)
+
+        old_shares = [(split.user_id, split.amount) for split in expense.splits]
+        deltas = debt_deltas(expense.payer_id, old_shares, rate=expense.fx_rate, sign=-1)
+        for split in expense.splits:
+            db.session.delete(split)
+
+        expense.amount = data['amount']
+        expense.description = data['description']
+        expense.split_method = data['split_method']
+        expense.currency = currency
+        expense.fx_rate = rate
+        expense.payer = payer
+
+        shares = _add_splits(expense, data)
+        if shares is None:
+            db.session.rollback()
+            return jsonify({'error': 'Percentage splits must add up to 100%'}), 400
+
+        # Only pairs whose amounts actually changed touch the debt table
+        apply_debt_deltas(debt_deltas(payer.id, shares, rate=rate, deltas=deltas))
+        db.session.commit()
+        return jsonify({'message': 'Expense updated successfully'})
+
+    except HTTPException:
+        db.session.rollback()
+        raise
+
+    except (KeyError, TypeError) as e:
+        db.session.rollback()
+        return jsonify({'error': f'Missing or invalid field: {e}'}), 400
+
+    except CurrencyError as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 400
+
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
+@bp.route('/expenses/<int:expense_id>', methods=['DELETE'])
+def delete_expense(expense_id):
+    expense = _get_live_expense_or_404(expense_id)
+    shares = [(split.user_id, split.amount) for split in expense.splits]
+    record_debts(expense.payer_id, shares, sign=-1, rate=expense.fx_rate)
+    expense.deleted_at = datetime.utcnow()
+    db.session.commit()
+    return jsonify({'message': 'Expense deleted successfully'})
+
 @bp.route('/users/', methods=['GET'])
 def get_all_users():
-    users = User.query.all()
-    return jsonify([{
-        'id': user.id,
-        'email': user.email,
-        'name': user.name,
-        'mobile': user.mobile
-    } for user in users])
+    result = db.session.execute(
+        select(User.id, User.email, User.name, User.mobile).order_by(User.id)
+    )
+    return jsonify(serialize_rows(result))
 
 @bp.route('/')
 def home():
@@ -108,39 +225,75 @@ def home():
 
 @bp.route('/users/<int:user_id>/expenses', methods=['GET'])
 def get_user_expenses(user_id):
-    user = User.query.get_or_404(user_id)
-    expenses = [
-        {
-            'id': expense.id,
-            'amount': expense.amount,
-            'description': expense.description,
-            'date': expense.date,
-            'split_method': expense.split_method
-        }
-        for expense in user.expenses
-    ]
-    return jsonify(expenses)
+    User.query.get_or_404(user_id)
+    result = db.session.execute(
+        select(
+            Expense.id, Expense.amount, Expense.currency, Expense.description,
+            Expense.date, Expense.split_method
+        )
+        .where(Expense.payer_id == user_id, Expense.deleted_at.is_(None))
+        .order_by(Expense.id)
+    )
+    return jsonify(serialize_rows(result))
+
+@bp.route('/users/<int:user_id>/debts', methods=['GET'])
+def get_user_debts_route(user_id):
+    User.query.get_or_404(user_id)
+    return jsonify(get_user_debts(user_id))
 
 @bp.route('/expenses', methods=['GET'])
 def get_all_expenses():
-    expenses = Expense.query.all()
-    return jsonify([
-        {
-            'id': expense.id,
-            'amount': expense.amount,
-            'description': expense.description,
-            'date': expense.date,
-            'split_method': expense.split_method,
-            'payer': expense.payer.name
-        }
-        for expense in expenses
-    ])
+    result = db.session.execute(
+        select(
+            Expense.id, Expense.amount, Expense.currency, Expense.description,
+            Expense.date, Expense.split_method, User.name.label('payer')
+        )
+        .join(User, Expense.payer_id == User.id)
+        .where(Expense.deleted_at.is_(None))
+        .order_by(Expense.id)
+    )
+    return jsonify(serialize_rows(result))
+
+@bp.route('/expenses/search', methods=['GET'])
+def search_expenses_route():
+    try:
+        expenses, next_cursor = search_expenses(request.args)
+    except SearchError as e:
+        return jsonify({'error': str(e)}), 400
+    return jsonify({'expenses': expenses, 'next_cursor': next_cursor})
 
 @bp.route('/balance-sheet', methods=['GET'])
 def download_balance_sheet():
     balance_sheet = generate_balance_sheet()
     return jsonify(balance_sheet)
 
+@bp.route('/rates', methods=['POST'])
+def add_rate():
+    data = request.json
+    try:
+        currency = normalize_currency(data['currency'])
+        rate_date = date.fromisoformat(data['date'])
+        rate = float(data['rate'])
+    except (KeyError, TypeError, ValueError) as e:
+        return jsonify({'error': f'Invalid rate: {e}'}), 400
+    if not math.isfinite(rate) or rate <= 0:
+        return jsonify({'error': 'Rate must be a positive number'}), 400
+    try:
+        set_rate(currency, rate_date, rate)
+    except CurrencyError as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 400
+    db.session.commit()
+    return jsonify({'message': 'Rate saved successfully'}), 201
+
+@bp.route('/rates', methods=['GET'])
+def get_rates():
+    stmt = select(ExchangeRate.currency, ExchangeRate.date, ExchangeRate.rate)
+    if request.args.get('currency'):
+        stmt = stmt.where(ExchangeRate.currency == request.args['currency'].upper())
+    result = db.session.execute(stmt.order_by(ExchangeRate.currency, ExchangeRate.date))
+    return jsonify(serialize_rows(result))
+
 
 # app.config['JWT_SECRET_KEY'] = 'NxA7g7j/6zzeLDmQTHkLSZ6U5RddCH0PVStVlDse8nw=' 
 # jwt = JWTManager(app)
@@ -0,0 +1,208 @@
+"""
+Expense search with full-text matching and keyset pagination.
+
+Full-text search on ``Expense.description`` uses an FTS5 table on SQLite and
+a GIN ``tsvector`` index on PostgreSQL; other databases fall back to a
+case-insensitive substring match. Results are ordered newest first by
+(date, id) and paged with an opaque cursor, so deep pages cost the same as
+the first one.
+"""
+import base64
+from datetime import date, datetime, timedelta
+
+from sqlalchemy import Integer, column, event, func, or_, select, text
+
+from app import db
+from app.models import Expense, User
+from app.serializers import serialize_rows
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+_SQLITE_FTS_DDL = [
+    "CREATE VIRTUAL TABLE IF NOT EXISTS expense_fts "
+    "USING fts5(description, content='expense', content_rowid='id')",
+    "CREATE TRIGGER IF NOT EXISTS expense_fts_ai AFTER INSERT ON expense BEGIN "
+    "INSERT INTO expense_fts(rowid, description) VALUES (new.id, new.description); END",
+    "CREATE TRIGGER IF NOT EXISTS expense_fts_ad AFTER DELETE ON expense BEGIN "
+    "INSERT INTO expense_fts(expense_fts, rowid, description) "
+    "VALUES ('delete', old.id, old.description); END",
+    "CREATE TRIGGER IF NOT EXISTS expense_fts_au AFTER UPDATE OF description ON expense BEGIN "
+    "INSERT INTO expense_fts(expense_fts, rowid, description) "
+    "VALUES ('delete', old.id, old.description); "
+    "INSERT INTO expense_fts(rowid, description) VALUES (new.id, new.description); END",
+]
+
+_POSTGRES_FTS_DDL = [
+    "CREATE INDEX IF NOT EXISTS ix_expense_description_fts "
+    "ON expense USING gin (to_tsvector('english', description))",
+]
+
+
+class SearchError(ValueError):
+    """Raised when search parameters cannot be parsed."""
+
+
+def create_fulltext_index(connection):
+    """
+    Create the full-text index for expense descriptions if it is missing.
+
+    Safe to call repeatedly. On SQLite a newly created FTS table is
+    backfilled from existing rows.
+    """
+    dialect = connection.dialect.name
+    if dialect == 'sqlite':
+        exists = connection.execute(text(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'expense_fts'"
+        )).first()
+        for statement in _SQLITE_FTS_DDL:
+            connection.execute(text(statement))
+        if not exists:
+            connection.execute(text("INSERT INTO expense_fts(expense_fts) VALUES ('rebuild')"))
+    elif dialect == 'postgresql':
+        for statement in _POSTGRES_FTS_DDL:
+            connection.execute(text(statement))
+
+
+@event.listens_for(Expense.__table__, 'after_create')
+def _create_fulltext_index(target, connection, **kw):
+    create_fulltext_index(connection)
+
+
+@event.listens_for(Expense.__table__, 'before_drop')
+def _drop_fulltext_index(target, connection, **kw):
+    if connection.dialect.name == 'sqlite':
+        connection.execute(text('DROP TABLE IF EXISTS expense_fts'))
+
+
+def _fulltext_condition(query):
+    """Build the WHERE clause matching ``query`` against descriptions."""
+    dialect = db.engine.dialect.name
+    if dialect == 'sqlite':
+        # Quote every term so user input is never parsed as FTS5 syntax
+        terms = ' '.join('"%s"' % term.replace('"', '""') for term in query.split())
+        matches = text('SELECT rowid FROM expense_fts WHERE expense_fts MATCH :terms')
+        return Expense.id.in_(matches.bindparams(terms=terms).columns(column('rowid', Integer)))
+    if dialect == 'postgresql':
+        return func.to_tsvector('english', Expense.description).op('@@')(
+            func.plainto_tsquery('english', query)
+        )
+    escaped = query.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+    return Expense.description.ilike(f'%{escaped}%', escape='\\')
+
+
+def encode_cursor(expense_date, expense_id):
+    """Encode the position after (date, id) as an opaque cursor string."""
+    raw = f'{expense_date.isoformat()}|{expense_id}'.encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    """Decode a cursor produced by :func:`encode_cursor`."""
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        expense_date, expense_id = base64.urlsafe_b64decode(padded).decode().split('|')
+        return datetime.fromisoformat(expense_date), int(expense_id)
+    except (ValueError, UnicodeDecodeError):
+        raise SearchError('Invalid cursor')
+
+
+def _parse(args, name, parser):
+    value = args.get(name)
+    if value in (None, ''):
+        return None
+    try:
+        return parser(value)
+    except ValueError:
+        raise SearchError(f'Invalid value for {name}: {value}')
+
+
+def _is_date_only(value):
+    try:
+        date.fromisoformat(value)
+    except ValueError:
+        return False
+    return True
+
+
+def _filters(args):
+    """Build the WHERE conditions for the search parameters in ``args``."""
+    conditions = []
+
+    query = (args.get('q') or '').strip()
+    if query:
+        conditions.append(_fulltext_condition(query))
+
+    min_amount = _parse(args, 'min_amount', float)
+    if min_amount is not None:
+        conditions.append(Expense.amount >= min_amount)
+    max_amount = _parse(args, 'max_amount', float)
+    if max_amount is not None:
+        conditions.append(Expense.amount <= max_amount)
+
+    start_date = _parse(args, 'start_date', datetime.fromisoformat)
+    if start_date is not None:
+        conditions.append(Expense.date >= start_date)
+    end_date = _parse(args, 'end_date', datetime.fromisoformat)
+    if end_date is not None:
+        if _is_date_only(args['end_date']):
+            # A bare date includes everything up to the end of that day
+            conditions.append(Expense.date < end_date + timedelta(days=1))
+        else:
+            conditions.append(Expense.date <= end_date)
+
+    payer_id = _parse(args, 'payer_id', int)
+    if payer_id is not None:
+        conditions.append(Expense.payer_id == payer_id)
+    split_method = args.get('split_method')
+    if split_method:
+        conditions.append(Expense.split_method == split_method)
+    return conditions
+
+
+def search_expenses(args):
+    """
+    Search expenses using request query parameters.
+
+    Supported parameters: ``q`` (full-text on description), ``min_amount``,
+    ``max_amount``, ``start_date``, ``end_date`` (ISO 8601), ``payer_id``,
+    ``split_method``, ``limit`` and ``cursor``.
+
+    Args:
+        args: Mapping of query parameters (e.g. ``request.args``)
+
+    Returns:
+        Tuple of (list of expense dictionaries, next cursor or None)
+
+    Raises:
+        SearchError: If a parameter cannot be parsed
+    """
+    limit = _parse(args, 'limit', int)
+    if limit is None:
+        limit = DEFAULT_PAGE_SIZE
+    if limit < 1:
+        raise SearchError('limit must be positive')
+    limit = min(limit, MAX_PAGE_SIZE)
+
+    stmt = select(
+        Expense.id, Expense.amount, Expense.currency, Expense.description,
+        Expense.date, Expense.split_method, Expense.payer_id, User.name.label('payer')
+    ).join(User, Expense.payer_id == User.id).where(Expense.deleted_at.is_(None))
+    stmt = stmt.where(*_filters(args))
+
+    cursor = args.get('cursor')
+    if cursor:
+        after_date, after_id = decode_cursor(cursor)
+        # date <= cursor keeps this an index range scan on (date, id)
+        stmt = stmt.where(Expense.date <= after_date).where(
+            or_(Expense.date < after_date, Expense.id < after_id)
+        )
+
+    stmt = stmt.order_by(Expense.date.desc(), Expense.id.desc()).limit(limit + 1)
+    rows = serialize_rows(db.session.execute(stmt))
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(rows[-1]['date'], rows[-1]['id'])
+    return rows, next_cursor
@@ -0,0 +1,81 @@
+"""
+JSON serialization for API responses.
+
+Provides a Flask JSON provider backed by orjson when it is installed, with
+the standard library encoder as a fallback, and helpers that turn
+SQLAlchemy result rows straight into dictionaries without loading ORM
+objects.
+"""
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - exercised when orjson is absent
+    orjson = None
+
+
+class FastJSONProvider(DefaultJSONProvider):
+    """
+    JSON provider that encodes with orjson and falls back to the stdlib.
+
+    Output decodes to the same values as :class:`DefaultJSONProvider`:
+    datetimes are still sent as HTTP dates and non-string dict keys (e.g.
+    user ids in the balance sheet) are converted to strings. Key order can
+    differ, because orjson sorts keys after converting them to strings
+    (``"10"`` before ``"2"``) where the stdlib sorts the original integers.
+    Set ``JSON_USE_ORJSON = False`` to force the stdlib encoder.
+    """
+
+    def __init__(self, app):
+        super().__init__(app)
+        self.use_orjson = orjson is not None and app.config.get('JSON_USE_ORJSON', True)
+
+    def _orjson_options(self, indent=False):
+        options = orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS
+        if self.sort_keys:
+            options |= orjson.OPT_SORT_KEYS
+        if indent:
+            options |= orjson.OPT_INDENT_2
+        return options
+
+    def dumps_bytes(self, obj, indent=False):
+        """Serialize ``obj`` to UTF-8 encoded JSON bytes."""
+        if self.use_orjson:
+            return orjson.dumps(obj, default=self.default, option=self._orjson_options(indent))
+        if indent:
+            return super().dumps(obj, indent=2).encode('utf-8')
+        return super().dumps(obj, separators=(',', ':')).encode('utf-8')
+
+    def dumps(self, obj, **kwargs):
+        if self.use_orjson and not kwargs:
+            return self.dumps_bytes(obj).decode('utf-8')
+        return super().dumps(obj, **kwargs)
+
+    def loads(self, s, **kwargs):
+        if self.use_orjson and not kwargs:
+            return orjson.loads(s)
+        return super().loads(s, **kwargs)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        indent = (self.compact is None and self._app.debug) or self.compact is False
+        return self._app.response_class(
+            self.dumps_bytes(obj, indent=indent) + b'\n', mimetype=self.mimetype
+        )
+
+
+def serialize_rows(result):
+    """
+    Convert a SQLAlchemy result of column tuples into a list of dictionaries.
+
+    Works on the output of ``db.session.execute(select(Model.col, ...))`` so
+    no ORM instances are created; keys are the selected column labels.
+
+    Args:
+        result: SQLAlchemy ``Result`` from a column-level select
+
+    Returns:
+        List of dictionaries, one per row
+    """
+    keys = tuple(result.keys())
+    return [dict(zip(keys, row)) for row in result]
@@ -1,3 +1,5 @@
+from sqlalchemy import func, select
+from app import db
 from app.models import User, Expense, ExpenseSplit
 
 def validate_percentage_split(splits):
@@ -5,25 +7,33 @@ def validate_percentage_split(splits):
     return abs(total_percentage - 100) < 0.01
 
 def generate_balance_sheet():
-    users = User.query.all()
     balance_sheet = {}
-
-    for user in users:
-        balance_sheet[user.id] = {
-            'name': user.name,
-            'email': user.email,
+    for user_id, name, email in db.session.execute(select(User.id, User.name, User.email)):
+        balance_sheet[user_id] = {
+            'name': name,
+            'email': email,
             'total_paid': 0,
             'total_owed': 0,
             'net_balance': 0
         }
 
-    expenses = Expense.query.all()
-    for expense in expenses:
-        payer = expense.payer
-        balance_sheet[payer.id]['total_paid'] += expense.amount
+    # Amounts are converted to the base currency inside the aggregates
+    paid = db.session.execute(
+        select(Expense.payer_id, func.sum(Expense.amount * Expense.fx_rate))
+        .where(Expense.deleted_at.is_(None))
+        .group_by(Expense.payer_id)
+    )
+    for user_id, total in paid:
+        balance_sheet[user_id]['total_paid'] = total
 
-        for split in expense.splits:
-            balance_sheet[split.user.id]['total_owed'] += split.amount
+    owed = db.session.execute(
+        select(ExpenseSplit.user_id, func.sum(ExpenseSplit.amount * Expense.fx_rate))
+        .join(Expense, ExpenseSplit.expense_id == Expense.id)
+        .where(Expense.deleted_at.is_(None))
+        .group_by(ExpenseSplit.user_id)
+    )
+    for user_id, total in owed:
+        balance_sheet[user_id]['total_owed'] = total
 
     for user_id, data in balance_sheet.items():
         data['net_balance'] = data['total_paid'] - data['total_owed']
@@ -0,0 +1,98 @@
+"""
+Benchmark balance sheet generation for single- and multi-currency data.
+
+Seeds the same expenses twice, once all in the base currency and once
+spread over four currencies priced with daily rates, and times
+``generate_balance_sheet`` on each. Also times repricing a day's
+expenses after a rate change.
+
+Usage:
+    SECRET_KEY=bench python benchmarks/bench_balance.py [expenses]
+"""
+import os
+import statistics
+import sys
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from sqlalchemy import insert  # noqa: E402
+
+from app import create_app, db  # noqa: E402
+from app.models import User, Expense, ExpenseSplit, ExchangeRate  # noqa: E402
+from app.currency import set_rate  # noqa: E402
+from app.utils import generate_balance_sheet  # noqa: E402
+
+USERS = 200
+START = datetime(2024, 1, 1)
+
+
+def seed(expenses, currencies, batch=20_000):
+    """Insert expenses split three ways, cycling through ``currencies``."""
+    db.session.execute(insert(User), [
+        {'email': f'user{i}@bench.test', 'name': f'User {i}', 'mobile': '0000000000'}
+        for i in range(1, USERS + 1)
+    ])
+    days = expenses // 480 + 1
+    rates = [
+        {'currency': currency, 'date': (START + timedelta(days=d)).date(), 'rate': 50 + d % 40}
+        for currency in currencies[1:]
+        for d in range(days)
+    ]
+    if rates:
+        db.session.execute(insert(ExchangeRate), rates)
+    for offset in range(0, expenses, batch):
+        ids = range(offset + 1, min(offset + batch, expenses) + 1)
+        db.session.execute(insert(Expense), [
+            {
+                'id': i,
+                'amount': 30.0,
+                'description': f'Expense {i}',
+                'split_method': 'equal',
+                'currency': currencies[i % len(currencies)],
+                'fx_rate': 1.0 if i % len(currencies) == 0 else 50 + (i * 3 // 1440) % 40,
+                'date': START + timedelta(minutes=i * 3),
+                'payer_id': i % USERS + 1
+            }
+            for i in ids
+        ])
+        db.session.execute(insert(ExpenseSplit), [
+            {'expense_id': i, 'user_id': (i + k) % USERS + 1, 'amount': 10.0}
+            for i in ids
+            for k in range(3)
+        ])
+    db.session.commit()
+
+
+def run(label, expenses, currencies, repeat=5):
+    app = create_app('testing')
+    with app.app_context():
+        db.create_all()
+        seed(expenses, currencies)
+        samples = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            generate_balance_sheet()
+            samples.append(time.perf_counter() - started)
+        print(f'{label:<24} {statistics.median(samples) * 1000:8.1f} ms')
+
+        if len(currencies) > 1:
+            started = time.perf_counter()
+            set_rate(currencies[1], (START + timedelta(days=10)).date(), 99.0)
+            db.session.commit()
+            print(f'{"reprice one day (" + currencies[1] + ")":<24} '
+                  f'{(time.perf_counter() - started) * 1000:8.1f} ms')
+        db.session.remove()
+        db.drop_all()
+
+
+def main():
+    expenses = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+    print(f'{expenses} expenses, {expenses * 3} splits, {USERS} users')
+    run('single currency', expenses, ['INR'])
+    run('four currencies', expenses, ['INR', 'USD', 'EUR', 'GBP'])
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,117 @@
+"""
+Benchmark JSON response building for large expense listings.
+
+Compares the previous approach (ORM objects, hand-built dicts, stdlib
+encoder) with column-level selects serialized by ``serialize_rows`` under
+both the stdlib and orjson encoders. Each path is timed in an untraced run
+(median of several) and its peak memory is measured in a separate run
+under tracemalloc, which slows allocation-heavy code considerably.
+
+Usage:
+    SECRET_KEY=bench python benchmarks/bench_json.py [rows]
+"""
+import os
+import statistics
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from sqlalchemy import insert, select  # noqa: E402
+
+from app import create_app, db  # noqa: E402
+from app.models import User, Expense  # noqa: E402
+from app.serializers import FastJSONProvider, serialize_rows  # noqa: E402
+
+
+def seed(rows):
+    """Insert ``rows`` expenses spread across 100 payers."""
+    db.session.execute(insert(User), [
+        {'email': f'user{i}@bench.test', 'name': f'User {i}', 'mobile': '0000000000'}
+        for i in range(1, 101)
+    ])
+    db.session.execute(insert(Expense), [
+        {
+            'amount': float(i % 5000) + 0.25,
+            'description': f'Expense {i}',
+            'split_method': 'equal',
+            'payer_id': i % 100 + 1
+        }
+        for i in range(rows)
+    ])
+    db.session.commit()
+
+
+def orm_dicts():
+    return [
+        {
+            'id': expense.id,
+            'amount': expense.amount,
+            'description': expense.description,
+            'date': expense.date,
+            'split_method': expense.split_method,
+            'payer': expense.payer.name
+        }
+        for expense in Expense.query.all()
+    ]
+
+
+def row_dicts():
+    return serialize_rows(db.session.execute(
+        select(
+            Expense.id, Expense.amount, Expense.description, Expense.date,
+            Expense.split_method, User.name.label('payer')
+        )
+        .join(User, Expense.payer_id == User.id)
+        .order_by(Expense.id)
+    ))
+
+
+def run(build, provider):
+    db.session.expunge_all()
+    started = time.perf_counter()
+    payload = build()
+    built = time.perf_counter()
+    body = provider.dumps_bytes(payload)
+    finished = time.perf_counter()
+    return built - started, finished - built, len(body)
+
+
+def measure(label, build, provider, repeat=5):
+    timings = [run(build, provider) for _ in range(repeat)]
+    build_time = statistics.median(timing[0] for timing in timings)
+    encode_time = statistics.median(timing[1] for timing in timings)
+    size = timings[0][2]
+
+    tracemalloc.start()
+    run(build, provider)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f'{label:<28} build {build_time:7.3f}s  encode {encode_time:7.3f}s  '
+          f'peak {peak / 2 ** 20:8.1f} MiB  body {size / 2 ** 20:6.1f} MiB')
+
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    app = create_app('testing')
+
+    with app.app_context():
+        db.create_all()
+        seed(rows)
+
+        stdlib = FastJSONProvider(app)
+        stdlib.use_orjson = False
+        fast = FastJSONProvider(app)
+
+        print(f'{rows} expense rows')
+        measure('orm objects + stdlib', orm_dicts, stdlib)
+        measure('row tuples + stdlib', row_dicts, stdlib)
+        if fast.use_orjson:
+            measure('row tuples + orjson', row_dicts, fast)
+        else:
+            print('orjson not installed, skipping')
+
+
+if __name__ == '__main__':
+    main()
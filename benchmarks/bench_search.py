@@ -0,0 +1,86 @@
+"""
+Benchmark expense search over a large table.
+
+Seeds the requested number of expenses (1M by default) and times typical
+``/expenses/search`` queries: the first page, a page deep into the result
+set reached through the cursor, and each filter on its own. Timings are the
+median of several runs through ``search_expenses``.
+
+Usage:
+    SECRET_KEY=bench python benchmarks/bench_search.py [rows]
+"""
+import os
+import statistics
+import sys
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from sqlalchemy import insert  # noqa: E402
+
+from app import create_app, db  # noqa: E402
+from app.models import User, Expense  # noqa: E402
+from app.search import encode_cursor, search_expenses  # noqa: E402
+
+WORDS = ['dinner', 'taxi', 'hotel', 'groceries', 'flight', 'coffee', 'museum', 'fuel', 'rent', 'snacks']
+METHODS = ['equal', 'exact', 'percentage']
+
+
+def seed(rows, batch=50_000):
+    """Insert ``rows`` expenses spread across 1000 payers and ~3 years."""
+    db.session.execute(insert(User), [
+        {'email': f'user{i}@bench.test', 'name': f'User {i}', 'mobile': '0000000000'}
+        for i in range(1, 1001)
+    ])
+    start = datetime(2022, 1, 1)
+    for offset in range(0, rows, batch):
+        db.session.execute(insert(Expense), [
+            {
+                'amount': float((i * 37) % 10000) / 10,
+                'description': f'{WORDS[i % 10]} with {WORDS[(i // 10) % 10]} #{i}',
+                'split_method': METHODS[i % 3],
+                'payer_id': i % 1000 + 1,
+                'date': start + timedelta(seconds=i * 90)
+            }
+            for i in range(offset, min(offset + batch, rows))
+        ])
+    db.session.commit()
+
+
+def timed(label, args, repeat=5):
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        expenses, _ = search_expenses(args)
+        samples.append(time.perf_counter() - started)
+    print(f'{label:<34} {statistics.median(samples) * 1000:8.2f} ms  ({len(expenses)} rows)')
+
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    app = create_app('testing')
+
+    with app.app_context():
+        db.create_all()
+        started = time.perf_counter()
+        seed(rows)
+        print(f'seeded {rows} expenses in {time.perf_counter() - started:.1f}s')
+
+        middle = db.session.get(Expense, rows // 2)
+        deep_cursor = encode_cursor(middle.date, middle.id)
+
+        timed('first page', {})
+        timed('deep page (cursor at 50%)', {'cursor': deep_cursor})
+        timed('payer_id', {'payer_id': '42'})
+        timed('split_method', {'split_method': 'exact'})
+        timed('amount range', {'min_amount': '500', 'max_amount': '501'})
+        timed('date range', {'start_date': '2023-06-01', 'end_date': '2023-06-02'})
+        timed('full-text, common word', {'q': 'coffee'})
+        timed('full-text, two words', {'q': 'taxi museum'})
+        timed('full-text, unique token', {'q': str(rows - 1)})
+        timed('full-text + payer + amount', {'q': 'hotel', 'payer_id': '3', 'min_amount': '100'})
+
+
+if __name__ == '__main__':
+    main()
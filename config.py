@@ -16,6 +16,32 @@ class Config:
     TESTING = False
     DEBUG = False
 
+    # Use orjson for API responses when installed (falls back to stdlib json)
+    JSON_USE_ORJSON = os.environ.get('JSON_USE_ORJSON', 'true').lower() == 'true'
+
+    # Balances and debts are reported in this currency
+    BASE_CURRENCY = os.environ.get('BASE_CURRENCY', 'INR')
+
+    # Days deleted expenses are kept before compaction purges them
+    TOMBSTONE_RETENTION_DAYS = float(os.environ.get('TOMBSTONE_RETENTION_DAYS', 7))
+
+    # Request threads per gunicorn worker (also read by the Dockerfile's CMD)
+    GUNICORN_THREADS = int(os.environ.get('GUNICORN_THREADS', 4))
+    # One pooled connection per request thread besides the probe's; a busy
+    # thread beyond that borrows an overflow connection instead of waiting
+    SQLALCHEMY_ENGINE_OPTIONS = {'pool_size': max(GUNICORN_THREADS - 1, 1), 'max_overflow': 1}
+
+    # Health and readiness probes
+    HEALTH_DB_CHECK_INTERVAL = float(os.environ.get('HEALTH_DB_CHECK_INTERVAL', 5))
+    # Seconds a probe waits for the ping, and the age after which the last
+    # result no longer counts (e.g. while a ping is stuck on the database)
+    HEALTH_DB_PING_TIMEOUT = float(os.environ.get('HEALTH_DB_PING_TIMEOUT', 2))
+    HEALTH_DB_MAX_AGE = float(os.environ.get('HEALTH_DB_MAX_AGE', 3 * HEALTH_DB_CHECK_INTERVAL))
+    HEALTH_SATURATION_THRESHOLD = float(os.environ.get('HEALTH_SATURATION_THRESHOLD', 0.9))
+    # Requests other than the probe that fit alongside it, so usage reaches
+    # 1.0 once every other gunicorn thread is busy
+    HEALTH_MAX_INFLIGHT_REQUESTS = int(os.environ.get('HEALTH_MAX_INFLIGHT_REQUESTS', max(GUNICORN_THREADS - 1, 1)))
+
 
 class DevelopmentConfig(Config):
     """Development configuration."""
@@ -26,6 +52,8 @@ class TestingConfig(Config):
     """Testing configuration."""
     TESTING = True
     SQLALCHEMY_DATABASE_URI = 'sqlite:///:memory:'
+    # In-memory SQLite uses a single shared connection without a sized pool
+    SQLALCHEMY_ENGINE_OPTIONS = {}
 
 
 class ProductionConfig(Config):
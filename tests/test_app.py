@@ -8,13 +8,29 @@ These tests validate core functionality including:
 import pytest
 import sys
 import os
+import threading
+import time
 
 # Add parent directory to path
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
 from app import create_app, db
-from app.models import User, Expense, ExpenseSplit
+from app.models import User, Expense, ExpenseSplit, Debt
+from app.debts import apply_debt_deltas, check_debts
+from app.currency import CurrencyError, get_rate, set_rate
+from app.expenses import compact_expenses, upgrade_expense_table
 from app.utils import validate_percentage_split, generate_balance_sheet
+from app import health
+from app.serializers import FastJSONProvider, serialize_rows
+from datetime import date, datetime, timedelta
+from sqlalchemy import create_engine, inspect, select, text
+
+
+# The expense table as created before currencies, search and tombstones
+LEGACY_EXPENSE_TABLE = (
+    'CREATE TABLE expense (id INTEGER PRIMARY KEY, amount FLOAT, description VARCHAR(200), '
+    'date DATETIME, split_method VARCHAR(20), payer_id INTEGER)'
+)
 
 
 @pytest.fixture
@@ -65,6 +81,122 @@ class TestHealthEndpoints:
         assert response.status_code == 200
         data = response.get_json()
         assert data['message'] == 'Test route working'
+    
+    def test_healthz_reports_database(self, client):
+        """Test the liveness endpoint reports the last readiness ping."""
+        health.ping_database(force=True)
+        response = client.get('/healthz')
+        assert response.status_code == 200
+        data = response.get_json()
+        assert data['status'] == 'ok'
+        assert data['database']['ok'] is True
+    
+    def test_healthz_never_connects(self, client, monkeypatch):
+        """Test liveness answers from the cached ping without touching the database."""
+        def hang():
+            raise AssertionError('liveness must not connect')
+        monkeypatch.setattr(db.engine, 'connect', hang)
+        response = client.get('/healthz')
+        assert response.status_code == 200
+        assert response.get_json()['status'] == 'ok'
+    
+    def test_readyz_when_idle(self, client):
+        """Test the readiness endpoint reports ready with pool details."""
+        response = client.get('/readyz')
+        assert response.status_code == 200
+        data = response.get_json()
+        assert data['status'] == 'ready'
+        assert data['reasons'] == []
+        assert 'pool' in data and 'queue' in data
+    
+    def test_readyz_when_queue_saturated(self, app, client):
+        """Test readiness flips once every other request thread is busy."""
+        busy = app.config['GUNICORN_THREADS'] - 1
+        for _ in range(busy):
+            health.request_started()
+        try:
+            response = client.get('/readyz')
+        finally:
+            for _ in range(busy):
+                health.request_finished()
+        assert response.status_code == 503
+        assert 'request queue saturated' in response.get_json()['reasons']
+    
+    def test_readyz_when_pool_saturated(self, app, client):
+        """Test readiness flips once the default pool is fully checked out."""
+        connections = [db.engine.connect() for _ in range(app.config['GUNICORN_THREADS'] - 1)]
+        try:
+            response = client.get('/readyz')
+        finally:
+            for connection in connections:
+                connection.close()
+        assert response.status_code == 503
+        data = response.get_json()
+        assert 'connection pool saturated' in data['reasons']
+        assert data['pool']['usage'] == 1.0
+    
+    def test_database_ping_is_cached(self, app, monkeypatch):
+        """Test the database ping is rate limited by the check interval."""
+        app.config['HEALTH_DB_CHECK_INTERVAL'] = 60
+        first = health.ping_database(force=True)
+        assert first['ok'] is True
+        
+        def fail_connect():
+            raise AssertionError('database should not be pinged again')
+        monkeypatch.setattr(db.engine, 'connect', fail_connect)
+        second = health.ping_database()
+        assert second['ok'] is True
+        assert second['latency_ms'] == first['latency_ms']
+    
+    def test_readyz_with_hanging_database(self, app, client, monkeypatch):
+        """Test a ping stuck on the database fails readiness within the deadline."""
+        app.config['HEALTH_DB_CHECK_INTERVAL'] = 0
+        app.config['HEALTH_DB_PING_TIMEOUT'] = 0.1
+        app.config['HEALTH_DB_MAX_AGE'] = 0.3
+        release = threading.Event()
+        real_connect = db.engine.connect
+        
+        def slow_connect():
+            release.wait(5)
+            return real_connect()
+        monkeypatch.setattr(db.engine, 'connect', slow_connect)
+        
+        started = time.monotonic()
+        response = client.get('/readyz')
+        assert time.monotonic() - started < 1
+        assert response.status_code == 503
+        assert response.get_json()['database']['error'] == 'database check timed out'
+        
+        # The stuck ping holds the guard; once its last result ages out the
+        # database is still reported as down rather than the old success
+        time.sleep(0.4)
+        database = health.ping_database(force=True)
+        assert database['ok'] is False
+        assert database['error'] == 'database check stale'
+        
+        release.set()
+        while health._ping_guard.locked():
+            time.sleep(0.01)
+        assert health.ping_database()['ok'] is True
+    
+    def test_healthz_database_down(self, app, client, monkeypatch):
+        """Test liveness survives a database outage that readiness reports."""
+        def fail_connect():
+            raise RuntimeError('connection refused to db.internal as admin')
+        monkeypatch.setattr(db.engine, 'connect', fail_connect)
+        health.ping_database(force=True)
+        response = client.get('/healthz')
+        assert response.status_code == 200
+        data = response.get_json()
+        assert data['status'] == 'ok'
+        assert data['database']['ok'] is False
+        assert data['database']['error'] == 'database unreachable'
+        response = client.get('/readyz')
+        assert response.status_code == 503
+        assert 'database unreachable' in response.get_json()['reasons']
+        assert 'db.internal' not in response.get_data(as_text=True)
+        monkeypatch.undo()
+        health.ping_database(force=True)
 
 
 class TestUserManagement:
@@ -284,6 +416,504 @@ class TestBalanceSheet:
             assert balance_sheet[sample_users[0]]['net_balance'] == 200  # paid 300, owes 100
 
 
+class TestDebts:
+    """Test pairwise debt tracking."""
+    
+    @pytest.fixture
+    def expenses(self, client, sample_users):
+        """Alice pays 300 split equally, then Bob pays 90 split with Alice."""
+        client.post('/expenses', json={
+            'payer_id': sample_users[0],
+            'amount': 300,
+            'description': 'Dinner',
+            'split_method': 'equal',
+            'participants': sample_users
+        })
+        client.post('/expenses', json={
+            'payer_id': sample_users[1],
+            'amount': 90,
+            'description': 'Taxi',
+            'split_method': 'exact',
+            'splits': [
+                {'user_id': sample_users[0], 'amount': 60},
+                {'user_id': sample_users[1], 'amount': 30}
+            ]
+        })
+    
+    def test_debts_are_recorded_per_pair(self, app, sample_users, expenses):
+        """Test the debt table holds one row per debtor and creditor."""
+        with app.app_context():
+            debts = {(d.debtor_id, d.creditor_id): d.amount for d in Debt.query.all()}
+        alice, bob, charlie = sample_users
+        assert debts == {(bob, alice): 100, (charlie, alice): 100, (alice, bob): 60}
+    
+    def test_deltas_are_added_in_the_database(self, app, sample_users, expenses):
+        """Test concurrent changes to a pair are kept rather than overwritten."""
+        alice, bob, charlie = sample_users
+        with app.app_context():
+            stale = Debt.query.filter_by(debtor_id=bob, creditor_id=alice).one()
+            # Another transaction adds to the pair after this one read it
+            db.session.execute(text('UPDATE debt SET amount = amount + 50 WHERE id = :id'), {'id': stale.id})
+            apply_debt_deltas({(bob, alice): 10, (charlie, bob): 5, (alice, bob): -60})
+            db.session.commit()
+            debts = dict(((d, c), a) for d, c, a in db.session.execute(
+                select(Debt.debtor_id, Debt.creditor_id, Debt.amount)
+            ))
+        assert debts == {(bob, alice): 160, (charlie, alice): 100, (charlie, bob): 5}
+    
+    def test_user_debts_endpoint(self, client, sample_users, expenses):
+        """Test debts are netted per counterparty."""
+        alice, bob, charlie = sample_users
+        response = client.get(f'/users/{alice}/debts')
+        assert response.status_code == 200
+        data = {entry['user_id']: entry for entry in response.get_json()}
+        assert data[bob]['owes'] == 60
+        assert data[bob]['owed'] == 100
+        assert data[bob]['net'] == 40
+        assert data[charlie]['net'] == 100
+        assert data[charlie]['name'] == 'Charlie'
+    
+    def test_user_debts_unknown_user(self, client):
+        """Test debts for a missing user return 404."""
+        assert client.get('/users/9999/debts').status_code == 404
+    
+    def test_consistency_check_and_repair(self, app, sample_users, expenses):
+        """Test the checker detects drift and rebuilds from raw splits."""
+        with app.app_context():
+            assert check_debts() == []
+            debt = Debt.query.filter_by(debtor_id=sample_users[1]).first()
+            debt.amount = 1
+            db.session.commit()
+            
+            mismatches = check_debts(repair=True)
+            assert len(mismatches) == 1
+            assert mismatches[0]['expected'] == 100
+            assert check_debts() == []
+    
+    def test_check_debts_command(self, app, expenses):
+        """Test the CLI command reports a consistent table."""
+        result = app.test_cli_runner().invoke(args=['check-debts'])
+        assert result.exit_code == 0
+        assert 'consistent' in result.output
+
+
+class TestCurrency:
+    """Test multi-currency expenses and conversion."""
+    
+    @pytest.fixture
+    def expenses(self, client, sample_users):
+        """Alice pays 10 USD and Bob pays 100 INR, both split with each other."""
+        alice, bob, _ = sample_users
+        client.post('/rates', json={'currency': 'usd', 'date': '2020-01-01', 'rate': 83})
+        client.post('/expenses', json={
+            'payer_id': alice,
+            'amount': 10,
+            'currency': 'USD',
+            'description': 'Museum tickets',
+            'split_method': 'equal',
+            'participants': [alice, bob]
+        })
+        client.post('/expenses', json={
+            'payer_id': bob,
+            'amount': 100,
+            'description': 'Chai',
+            'split_method': 'equal',
+            'participants': [alice, bob]
+        })
+    
+    def test_expense_without_rate_rejected(self, client, sample_users):
+        """Test expenses in a currency with no known rate are rejected."""
+        response = client.post('/expenses', json={
+            'payer_id': sample_users[0],
+            'amount': 10,
+            'currency': 'EUR',
+            'description': 'Coffee',
+            'split_method': 'equal',
+            'participants': sample_users
+        })
+        assert response.status_code == 400
+        assert 'EUR' in response.get_json()['error']
+    
+    def test_invalid_rate_rejected(self, client):
+        """Test malformed rates are rejected."""
+        assert client.post('/rates', json={'currency': 'US', 'date': '2020-01-01', 'rate': 1}).status_code == 400
+        assert client.post('/rates', json={'currency': 'USD', 'date': 'soon', 'rate': 1}).status_code == 400
+        assert client.post('/rates', json={'currency': 'USD', 'date': '2020-01-01', 'rate': 0}).status_code == 400
+        assert client.post('/rates', json={'currency': 'USD', 'date': '2020-01-01', 'rate': 'inf'}).status_code == 400
+        assert client.post('/rates', json={'currency': 'USD', 'date': '2020-01-01', 'rate': 'nan'}).status_code == 400
+        assert client.get('/rates').get_json() == []
+    
+    def test_balance_sheet_converts_to_base(self, client, sample_users, expenses):
+        """Test balances sum converted amounts."""
+        alice, bob, _ = sample_users
+        data = client.get('/balance-sheet').get_json()
+        assert data[str(alice)]['total_paid'] == 830
+        assert data[str(alice)]['total_owed'] == 465
+        assert data[str(bob)]['net_balance'] == 100 - 465
+    
+    def test_debts_recorded_in_base(self, app, client, sample_users, expenses):
+        """Test pairwise debts are converted when recorded and on rebuild."""
+        alice, bob, _ = sample_users
+        data = client.get(f'/users/{alice}/debts').get_json()
+        assert data == [{'user_id': bob, 'name': 'Bob', 'owes': 50, 'owed': 415, 'net': 365}]
+        with app.app_context():
+            assert check_debts() == []
+    
+    def test_rate_change_reprices_expenses(self, app, client, sample_users, expenses):
+        """Test changing a rate updates affected balances and debts."""
+        alice, bob, _ = sample_users
+        client.post('/rates', json={'currency': 'USD', 'date': '2020-01-01', 'rate': 80})
+        sheet = client.get('/balance-sheet').get_json()
+        assert sheet[str(alice)]['total_paid'] == 800
+        debts = client.get(f'/users/{alice}/debts').get_json()
+        assert debts[0]['owed'] == 400
+        with app.app_context():
+            assert check_debts() == []
+    
+    def test_later_rate_only_reprices_later_expenses(self, app, client, sample_users, expenses):
+        """Test a rate dated after an expense does not change it."""
+        client.post('/rates', json={'currency': 'USD', 'date': '2999-01-01', 'rate': 1})
+        sheet = client.get('/balance-sheet').get_json()
+        assert sheet[str(sample_users[0])]['total_paid'] == 830
+    
+    def test_expense_defaults_to_base_currency(self, app, sample_users):
+        """Test the model default follows the configured base currency."""
+        app.config['BASE_CURRENCY'] = 'eur'
+        with app.app_context():
+            expense = Expense(amount=5, description='Tea', split_method='equal', payer_id=sample_users[0])
+            db.session.add(expense)
+            db.session.commit()
+            assert expense.currency == 'EUR'
+    
+    def test_base_currency_rate_rejected(self, client):
+        """Test the base currency cannot be given a rate."""
+        response = client.post('/rates', json={'currency': 'INR', 'date': '2020-01-01', 'rate': 2})
+        assert response.status_code == 400
+    
+    def test_expenses_report_currency(self, client, expenses):
+        """Test expense listings include the currency."""
+        data = client.get('/expenses').get_json()
+        assert [e['currency'] for e in data] == ['USD', 'INR']
+    
+    def test_rate_lookup_uses_latest_committed_rate(self, app, client):
+        """Test lookups see rate changes committed elsewhere immediately."""
+        client.post('/rates', json={'currency': 'EUR', 'date': '2024-01-01', 'rate': 90})
+        with app.app_context():
+            assert get_rate('EUR', date(2024, 6, 1)) == 90
+            db.session.execute(text("UPDATE exchange_rate SET rate = 95"))
+            db.session.commit()
+            assert get_rate('EUR', date(2024, 6, 1)) == 95
+            with pytest.raises(CurrencyError):
+                get_rate('EUR', date(2023, 12, 31))
+    
+    def test_rate_set_elsewhere_used_for_new_expense(self, app, client, sample_users, expenses):
+        """Test a rate set by another process is used by the next expense."""
+        alice, bob, _ = sample_users
+        with app.app_context():
+            assert get_rate('USD', date.today()) == 83
+            set_rate('USD', date(2020, 1, 1), 80)
+            db.session.commit()
+        client.post('/expenses', json={
+            'payer_id': alice,
+            'amount': 10,
+            'currency': 'USD',
+            'description': 'Ferry',
+            'split_method': 'equal',
+            'participants': [alice, bob]
+        })
+        with app.app_context():
+            assert Expense.query.filter_by(description='Ferry').one().fx_rate == 80
+            assert check_debts() == []
+        debts = client.get(f'/users/{alice}/debts').get_json()
+        assert debts[0]['owed'] == 800
+    
+    def test_currency_column_added_to_old_tables(self, app):
+        """Test databases created before currencies get the column added."""
+        engine = create_engine('sqlite://')
+        with app.app_context(), engine.begin() as connection:
+            connection.execute(text(LEGACY_EXPENSE_TABLE))
+            connection.execute(text('INSERT INTO expense (amount) VALUES (5)'))
+            upgrade_expense_table(connection)
+            row = connection.execute(text('SELECT currency, fx_rate, deleted_at FROM expense')).one()
+            assert tuple(row) == ('INR', 1.0, None)
+
+
+class TestExpenseEditing:
+    """Test updating, deleting and compacting expenses."""
+    
+    @pytest.fixture
+    def expense_id(self, app, client, sample_users):
+        """Alice pays 300 split equally between all three users."""
+        client.post('/expenses', json={
+            'payer_id': sample_users[0],
+            'amount': 300,
+            'description': 'Dinner',
+            'split_method': 'equal',
+            'participants': sample_users
+        })
+        with app.app_context():
+            return Expense.query.first().id
+    
+    def debts(self, app):
+        with app.app_context():
+            return {(d.debtor_id, d.creditor_id): d.amount for d in Debt.query.all()}
+    
+    def test_update_expense(self, app, client, sample_users, expense_id):
+        """Test an update replaces splits and applies the debt delta."""
+        alice, bob, charlie = sample_users
+        response = client.put(f'/expenses/{expense_id}', json={
+            'payer_id': alice,
+            'amount': 200,
+            'description': 'Dinner (corrected)',
+            'split_method': 'exact',
+            'splits': [
+                {'user_id': alice, 'amount': 50},
+                {'user_id': bob, 'amount': 150}
+            ]
+        })
+        assert response.status_code == 200
+        assert self.debts(app) == {(bob, alice): 150}
+        with app.app_context():
+            assert ExpenseSplit.query.count() == 2
+            assert check_debts() == []
+        sheet = client.get('/balance-sheet').get_json()
+        assert sheet[str(alice)]['total_paid'] == 200
+        assert client.get('/expenses').get_json()[0]['description'] == 'Dinner (corrected)'
+    
+    def test_update_changes_payer(self, app, client, sample_users, expense_id):
+        """Test moving an expense to another payer moves the debts."""
+        alice, bob, charlie = sample_users
+        client.put(f'/expenses/{expense_id}', json={
+            'payer_id': bob,
+            'amount': 300,
+            'description': 'Dinner',
+            'split_method': 'equal',
+            'participants': sample_users
+        })
+        assert self.debts(app) == {(alice, bob): 100, (charlie, bob): 100}
+    
+    def test_update_with_unknown_payer_returns_404(self, app, client, sample_users, expense_id):
+        """Test an unknown payer is a 404 rather than a server error."""
+        before = self.debts(app)
+        response = client.put(f'/expenses/{expense_id}', json={
+            'payer_id': 9999,
+            'amount': 300,
+            'description': 'Dinner',
+            'split_method': 'equal',
+            'participants': sample_users
+        })
+        assert response.status_code == 404
+        assert self.debts(app) == before
+    
+    def test_update_with_missing_field_returns_400(self, app, client, sample_users, expense_id):
+        """Test a body missing a required field is rejected as a bad request."""
+        before = self.debts(app)
+        response = client.put(f'/expenses/{expense_id}', json={
+            'payer_id': sample_users[0],
+            'description': 'Dinner',
+            'split_method': 'equal',
+            'participants': sample_users
+        })
+        assert response.status_code == 400
+        assert 'amount' in response.get_json()['error']
+        assert self.debts(app) == before
+    
+    def test_invalid_update_leaves_expense_unchanged(self, app, client, sample_users, expense_id):
+        """Test a rejected update rolls back splits and debts."""
+        before = self.debts(app)
+        response = client.put(f'/expenses/{expense_id}', json={
+            'payer_id': sample_users[0],
+            'amount': 300,
+            'description': 'Dinner',
+            'split_method': 'percentage',
+            'splits': [{'user_id': sample_users[1], 'percentage': 90}]
+        })
+        assert response.status_code == 400
+        assert self.debts(app) == before
+        with app.app_context():
+            assert ExpenseSplit.query.count() == 3
+    
+    def test_delete_expense(self, app, client, sample_users, expense_id):
+        """Test deleting tombstones the expense and reverses its debts."""
+        response = client.delete(f'/expenses/{expense_id}')
+        assert response.status_code == 200
+        assert self.debts(app) == {}
+        assert client.get('/expenses').get_json() == []
+        assert client.get('/expenses/search').get_json()['expenses'] == []
+        assert client.get('/balance-sheet').get_json()[str(sample_users[0])]['total_paid'] == 0
+        with app.app_context():
+            assert Expense.query.get(expense_id).deleted_at is not None
+            assert check_debts() == []
+    
+    def test_deleted_expense_not_found(self, client, expense_id):
+        """Test a deleted expense can no longer be updated or deleted."""
+        client.delete(f'/expenses/{expense_id}')
+        assert client.delete(f'/expenses/{expense_id}').status_code == 404
+        assert client.put(f'/expenses/{expense_id}', json={}).status_code == 404
+    
+    def test_compaction_purges_old_tombstones(self, app, client, expense_id):
+        """Test compaction removes tombstones past the retention period."""
+        client.delete(f'/expenses/{expense_id}')
+        with app.app_context():
+            assert compact_expenses(older_than=timedelta(days=1)) == 0
+            assert compact_expenses(older_than=timedelta(0)) == 1
+            assert Expense.query.count() == 0
+            assert ExpenseSplit.query.count() == 0
+    
+    def test_compact_command(self, app, client, expense_id):
+        """Test the CLI command reports purged expenses."""
+        client.delete(f'/expenses/{expense_id}')
+        result = app.test_cli_runner().invoke(args=['compact-expenses', '--older-than-days', '0'])
+        assert result.exit_code == 0
+        assert 'Purged 1' in result.output
+
+
+class TestSerialization:
+    """Test the JSON provider and row serializers."""
+    
+    def test_app_uses_fast_provider(self, app):
+        """Test the application is configured with the fast JSON provider."""
+        assert isinstance(app.json, FastJSONProvider)
+    
+    @pytest.mark.parametrize('use_orjson', [True, False])
+    def test_encoders_produce_same_payload(self, app, use_orjson):
+        """Test orjson and stdlib encoders agree on dates and int keys."""
+        provider = FastJSONProvider(app)
+        provider.use_orjson = use_orjson and provider.use_orjson
+        payload = {
+            10: {'date': datetime(2024, 1, 2, 3, 4, 5), 'amount': 10.5},
+            2: {'date': datetime(2024, 1, 3), 'amount': 1}
+        }
+        data = provider.loads(provider.dumps_bytes(payload))
+        assert data == {
+            '2': {'date': 'Wed, 03 Jan 2024 00:00:00 GMT', 'amount': 1},
+            '10': {'date': 'Tue, 02 Jan 2024 03:04:05 GMT', 'amount': 10.5}
+        }
+        # Only the order of integer keys differs between the encoders
+        expected_order = ['10', '2'] if provider.use_orjson else ['2', '10']
+        assert list(data) == expected_order
+    
+    def test_serialize_rows(self, app, sample_users):
+        """Test rows are converted using the selected column labels."""
+        with app.app_context():
+            result = db.session.execute(
+                select(User.id, User.name.label('user_name')).order_by(User.id)
+            )
+            rows = serialize_rows(result)
+        assert rows[0] == {'id': sample_users[0], 'user_name': 'Alice'}
+        assert len(rows) == 3
+    
+    def test_expenses_include_payer_name(self, client, sample_users):
+        """Test the expense listing joins in the payer name."""
+        client.post('/expenses', json={
+            'payer_id': sample_users[1],
+            'amount': 90,
+            'description': 'Lunch',
+            'split_method': 'equal',
+            'participants': sample_users
+        })
+        data = client.get('/expenses').get_json()
+        assert data[0]['payer'] == 'Bob'
+        assert data[0]['description'] == 'Lunch'
+        assert data[0]['date'].endswith('GMT')
+
+
+class TestExpenseSearch:
+    """Test expense search, filtering and pagination."""
+    
+    @pytest.fixture
+    def expenses(self, app, sample_users):
+        """Create expenses with distinct dates, payers and amounts."""
+        with app.app_context():
+            rows = [
+                ('Team dinner at the harbour', 120.0, 'equal', 0, datetime(2024, 1, 5)),
+                ('Taxi to airport', 45.5, 'exact', 1, datetime(2024, 1, 10)),
+                ('Hotel booking', 600.0, 'percentage', 0, datetime(2024, 2, 1)),
+                ('Dinner and drinks', 80.0, 'equal', 2, datetime(2024, 2, 14)),
+                ('Groceries', 30.0, 'equal', 1, datetime(2024, 3, 1)),
+            ]
+            for description, amount, method, payer, expense_date in rows:
+                db.session.add(Expense(
+                    description=description, amount=amount, split_method=method,
+                    payer_id=sample_users[payer], date=expense_date
+                ))
+            db.session.commit()
+    
+    def test_indexes_added_to_old_tables(self, app):
+        """Test the search indexes are created on existing expense tables."""
+        engine = create_engine('sqlite://')
+        with app.app_context(), engine.begin() as connection:
+            connection.execute(text(LEGACY_EXPENSE_TABLE))
+            upgrade_expense_table(connection)
+            upgrade_expense_table(connection)
+            indexes = {index['name'] for index in inspect(connection).get_indexes('expense')}
+        assert {
+            'ix_expense_date_id', 'ix_expense_payer_date_id',
+            'ix_expense_split_method_date_id', 'ix_expense_amount', 'ix_expense_deleted_at'
+        } <= indexes
+    
+    def test_search_without_filters_newest_first(self, client, expenses):
+        """Test unfiltered search returns all expenses newest first."""
+        response = client.get('/expenses/search')
+        assert response.status_code == 200
+        data = response.get_json()
+        assert [e['description'] for e in data['expenses']][:2] == ['Groceries', 'Dinner and drinks']
+        assert len(data['expenses']) == 5
+        assert data['next_cursor'] is None
+    
+    def test_fulltext_search(self, client, expenses):
+        """Test full-text search matches words in the description."""
+        data = client.get('/expenses/search?q=dinner').get_json()
+        assert {e['description'] for e in data['expenses']} == {
+            'Team dinner at the harbour', 'Dinner and drinks'
+        }
+    
+    def test_fulltext_search_ignores_query_syntax(self, client, expenses):
+        """Test search terms are not interpreted as FTS operators."""
+        response = client.get('/expenses/search?q=dinner OR "taxi')
+        assert response.status_code == 200
+        assert response.get_json()['expenses'] == []
+    
+    def test_combined_filters(self, app, client, sample_users, expenses):
+        """Test amount, date, payer and split method filters combine."""
+        with app.app_context():
+            db.session.add(Expense(
+                description='Late lunch', amount=150.0, split_method='equal',
+                payer_id=sample_users[0], date=datetime(2024, 1, 31, 12, 30)
+            ))
+            db.session.commit()
+        filters = (
+            f'/expenses/search?payer_id={sample_users[0]}&min_amount=100&max_amount=700'
+            '&start_date=2024-01-01&split_method=equal'
+        )
+        data = client.get(filters + '&end_date=2024-01-31').get_json()
+        assert [e['description'] for e in data['expenses']] == ['Late lunch', 'Team dinner at the harbour']
+        assert data['expenses'][0]['payer'] == 'Alice'
+        data = client.get(filters + '&end_date=2024-01-31T12:00:00').get_json()
+        assert [e['description'] for e in data['expenses']] == ['Team dinner at the harbour']
+    
+    def test_keyset_pagination(self, client, expenses):
+        """Test walking every page with the cursor returns each expense once."""
+        seen = []
+        url = '/expenses/search?limit=2'
+        while True:
+            data = client.get(url).get_json()
+            seen.extend(e['id'] for e in data['expenses'])
+            if not data['next_cursor']:
+                break
+            url = f"/expenses/search?limit=2&cursor={data['next_cursor']}"
+        assert len(seen) == 5
+        assert len(set(seen)) == 5
+    
+    def test_invalid_parameters(self, client, expenses):
+        """Test unparseable filters and cursors are rejected."""
+        assert client.get('/expenses/search?min_amount=abc').status_code == 400
+        assert client.get('/expenses/search?start_date=yesterday').status_code == 400
+        assert client.get('/expenses/search?cursor=not-a-cursor').status_code == 400
+        assert client.get('/expenses/search?limit=0').status_code == 400
+        assert client.get('/expenses/search?limit=-5').status_code == 400
+
+
 class TestEdgeCases:
     """Test edge cases and error handling."""
     